@@ -1,9 +1,55 @@
+import array
+import bisect
+import collections
+import concurrent.futures
 import itertools
 import functools
+import math
+import operator
+import os
+import sys
+import threading
 
 
 # helper singleton for lexicographic comparisons
 _fill = object()
+# helper singleton marking a match in the output of List._scan_substrings and similar
+_match = object()
+
+
+class _Hashed:
+    # stands in for an object with the (already computed) hash h, so a tuple containing it hashes just like one
+    # containing the object itself
+    __slots__ = ("h",)
+
+    def __init__(self, h):
+        self.h = h
+
+    def __hash__(self):
+        return self.h
+
+
+def _zipped(*items):
+    return List(items)
+
+
+class EvictedError(LookupError):
+    # raised when revisiting items that a streaming List (see List.stream) has already forgotten
+    pass
+
+
+# item types which can be stored in the cache of a packed List, by array typecode
+_PACKED_TYPES = {"q": int, "d": float}
+
+# types of iterable which can be evaluated ahead of time without any visible side effects
+# (not including mutable ones like list, which might still change before they're evaluated, or iterators, which the
+# caller might still be using)
+_PURE_SOURCES = frozenset({range, tuple, str, bytes})
+
+
+def _range_slice(r):
+    # the slice which selects exactly the (non-negative) indices in the range r
+    return slice(r.start, r.stop if r.stop >= 0 else None, r.step)
 
 
 class List:
@@ -18,7 +64,15 @@ class List:
     def _wrap(func):
         @functools.wraps(func)
         def inner(self, *args, **kwargs):
-            return type(self)(func(self, *args, **kwargs))
+            return type(self)(func(self, *args, **kwargs))._inherit(self)
+        return inner
+
+    @staticmethod
+    def _wrap_list(func):
+        # like _wrap, but for results whose items aren't items of self (e.g. indices), so are just a List
+        @functools.wraps(func)
+        def inner(self, *args, **kwargs):
+            return List(func(self, *args, **kwargs))._inherit(self)
         return inner
 
     @staticmethod
@@ -29,45 +83,323 @@ class List:
             return cls(func(*args, **kwargs))
         return inner
 
+    @classmethod
+    def _raw(cls, i):
+        # construct a cls from items which are already suitable for it, bypassing any conversion done by __init__
+        self = cls.__new__(cls)
+        List.__init__(self, i)
+        return self
+
     def __init__(self, i=()):
-        self.cache = []
+        # ranges are always of ints, so their items can be stored packed
+        self.cache = array.array("q") if type(i) is range else []
         self.finished = False
         self.it = iter(i)
         self._hash = None
+        # for slices, the parent List and the range of its indices which the slice selects
+        self._view = None
+        # for concatenations, the parts being concatenated (see _rope_push)
+        self._rope = None
+        # for the results of map and filter, the original source and the stages applied to it (see _pipe)
+        self._pipeline = None
+        # for combinatorial Lists, a function from an index to the item there, or _fill if it can't be found directly
+        self._unrank = None
+        # exact length (if known in advance) and a lower bound on the length
+        self._length, self._min_length = self._length_bounds(i)
+        # for streaming Lists, the number of recent items remembered, and how many earlier ones have been forgotten
+        self._window = None
+        self._offset = 0
+        # for thread-safe Lists, the lock which must be held to advance self.it
+        self._lock = None
+        # if evaluating in batches (see _force_batch), the size of the next batch, else 0
+        self._batch = self._BATCH if self._pure(i) else 0
 
     def __iter__(self):
+        if self._window is not None:
+            yield from self._iter_stream()
+            return
         if self.finished:
             yield from self.cache
             return
+        if self._view is not None and self._view[0].finished and not self._view[0]._offset:
+            # read straight out of the parent's cache, without copying into our own
+            yield from map(self._view[0].cache.__getitem__, self._view_range())
+            return
         i = 0
         while True:
             # yield any values from the cache that may have been put there by concurrent iteration of self
             while i < len(self.cache):
                 yield self.cache[i]
                 i += 1
+            if not self._force(i):
+                return
+
+    def _force(self, index):
+        # evaluate self up to (and including) index, returning whether it is in range
+        if self._lock is not None:
+            return self._force_locked(index)
+        if self._window is not None:
+            return self._force_stream(index)
+        if not self.finished:
+            try:
+                if self._batch:
+                    self._force_batch(index)
+                elif type(self.cache) is array.array:
+                    while len(self.cache) <= index:
+                        self._store((next(self.it),))
+                else:
+                    while len(self.cache) <= index:
+                        self.cache.append(next(self.it))
+            except StopIteration:
+                self.finished = True
+        return index < len(self.cache)
+
+    # sources without side effects are evaluated in batches, which are fetched in bulk rather than one next() at a time
+    # and grow geometrically the further self is evaluated
+    _BATCH = 16
+    _MAX_BATCH = 4096
+
+    @staticmethod
+    def _pure(i):
+        # whether evaluating the iterable i ahead of time has no visible side effects
+        return type(i) in _PURE_SOURCES or isinstance(i, List) and i.finished
+
+    def _force_batch(self, index):
+        if index < len(self.cache):
+            return
+        size = max(self._batch, index + 1 - len(self.cache))
+        chunk = list(itertools.islice(self.it, size))
+        self._store(chunk)
+        self._batch = min(2 * self._batch, self._MAX_BATCH)
+        if len(chunk) < size:
+            self.finished = True
+
+    @classmethod
+    def batched(cls, i=(), batch=True):
+        # like cls(i), but explicitly choosing whether to evaluate in batches, instead of only doing so for sources which
+        # are known not to have side effects
+        self = cls(i)
+        self._batch = self._BATCH if batch else 0
+        return self
+
+    @classmethod
+    def threadsafe(cls, i=()):
+        # like cls(i), but can be iterated over and indexed from multiple threads at once; derived Lists are thread-safe
+        # too (although only if used as a single consumer, streaming Lists can be)
+        self = cls(i)
+        self._lock = threading.RLock()
+        return self
+
+    def _force_locked(self, index):
+        # like _force, but for thread-safe Lists
+        # items which have already been evaluated are read without taking the lock at all, since the cache only ever
+        # grows (or is replaced by a longer one)
+        if index < len(self.cache) and self._window is None:
+            return True
+        with self._lock:
+            if self._window is not None:
+                return self._force_stream(index)
+            if not self.finished and len(self.cache) <= index:
+                # evaluate everything needed at once, so the lock is taken once per request rather than once per item
+                missing = max(index + 1 - len(self.cache), self._batch)
+                self._batch = min(2 * self._batch, self._MAX_BATCH)
+                chunk = list(itertools.islice(self.it, missing))
+                if type(self.cache) is array.array:
+                    self._store(chunk)
+                else:
+                    self.cache.extend(chunk)
+                if len(chunk) < missing:
+                    self.finished = True
+            return index < len(self.cache)
+
+    @classmethod
+    def stream(cls, i, window):
+        # like cls(i), but only remembers the most recent window items, so it can be iterated over in constant memory
+        # (as long as nothing needs to go back more than window items); derived Lists are streaming too
+        if window < 1:
+            raise ValueError("window must be positive")
+        self = cls(i)
+        self._window = window
+        if type(self.cache) is array.array:
+            self.cache = self.cache.tolist()
+        return self
+
+    def _inherit(self, source):
+        # make self stream, and be thread-safe, like source
+        if not self.finished:
+            if source._window is not None and self._window is None:
+                self._window = source._window
+                self.cache = list(self.cache)
+            if source._lock is not None and self._lock is None:
+                self._lock = threading.RLock()
+        return self
+
+    def _iter_stream(self):
+        i = 0
+        while True:
+            while i < self._offset + len(self.cache):
+                yield self._cached(i)
+                i += 1
+            if not self._force(i):
+                return
+
+    def _force_stream(self, index):
+        # like _force, but forgets old items
+        # items are forgotten in batches, so that the cache stays at most twice the window
+        if not self.finished:
+            cache = self.cache
             try:
-                self.cache.append(next(self.it))
-            # can't propogate StopIteration in a generator; have to catch and return explicitly
-            except StopIteration as e:
+                while self._offset + len(cache) <= index:
+                    cache.append(next(self.it))
+                    if len(cache) > 2 * self._window:
+                        forgotten = len(cache) - self._window
+                        del cache[:forgotten]
+                        self._offset += forgotten
+            except StopIteration:
                 self.finished = True
-                return e.value
+        return index < self._offset + len(self.cache)
+
+    def _cached(self, index):
+        # the item at index, which must already have been evaluated
+        if index < self._offset:
+            raise self._evicted(index)
+        return self.cache[index - self._offset]
+
+    def _whole_cache(self):
+        # the cache of a finished self, which must contain every item
+        if self._offset:
+            raise self._evicted(0)
+        return self.cache
+
+    def _evicted(self, index):
+        return EvictedError(
+            f"item {index} has been forgotten by a streaming List, which only remembers the last {self._window}"
+        )
+
+    def _store(self, items):
+        # add items to the cache, keeping it packed if it is already and they fit, otherwise falling back to a list
+        cache = self.cache
+        if type(cache) is array.array:
+            if not cache and items and type(items[0]) is float:
+                cache = self.cache = array.array("d")
+            # exact type check, since e.g. bools would otherwise be silently converted to ints
+            if {*map(type, items)} <= {_PACKED_TYPES[cache.typecode]}:
+                length = len(cache)
+                try:
+                    cache.extend(items)
+                    return
+                except OverflowError:
+                    del cache[length:]
+            cache = self.cache = cache.tolist()
+        cache.extend(items)
+
+    @classmethod
+    def packed(cls, i=()):
+        # like cls(i), but for ints or floats, stores the items compactly in an array, as long as they're all the same
+        # type (and fit in 64 bits); otherwise it falls back to storing them normally
+        self = cls(i)
+        if not self.cache:
+            self.cache = array.array("q")
+        return self
+
+    def buffer(self):
+        # zero-copy view of the items of a packed List
+        self.exhaust()
+        if type(self.cache) is not array.array:
+            raise TypeError("List is not packed")
+        return memoryview(self.cache).toreadonly()
+
+    def __buffer__(self, flags):
+        return self.buffer()
+
+    @staticmethod
+    def _item(x):
+        # convert x to be suitable as an item of this type of List
+        return x
+
+    @staticmethod
+    def _length_bounds(i):
+        # exact length of the iterable i (or None if unknown) and a lower bound on it, without any evaluation
+        if isinstance(i, List):
+            length = i._known_length()
+            if length is None:
+                return None, max(i._offset + len(i.cache), i._min_length)
+            return length, length
+        elif isinstance(i, (range, tuple, str, bytes)):
+            return len(i), len(i)
+        else:
+            return None, 0
+
+    def _with_length(self, length=None, min_length=0):
+        # record what is known in advance about the length of self
+        self._length = length
+        self._min_length = length if length is not None else min_length
+        return self
+
+    def _with_length_of(self, i, offset=0):
+        # record that self is offset items longer than the iterable i
+        length, min_length = self._length_bounds(i)
+        if length is not None:
+            length += offset
+        return self._with_length(length, min_length + offset)
 
     def exhaust(self):
         if not self.finished:
-            self.cache.extend(self.it)
-            self.finished = True
+            if self._lock is not None:
+                with self._lock:
+                    self._exhaust()
+            else:
+                self._exhaust()
         return self
 
+    def _exhaust(self):
+        if not self.finished:
+            if self._view is not None and self._view[0].finished and not self._view[0]._offset:
+                self.cache = self._view[0].cache[_range_slice(self._view_range())]
+            elif self._window is not None:
+                # only ever hold on to the window
+                while self._force(self._offset + len(self.cache)):
+                    pass
+            else:
+                while type(self.cache) is array.array and (chunk := list(itertools.islice(self.it, 4096))):
+                    self._store(chunk)
+                self.cache.extend(self.it)
+            self.finished = True
+
     def __reversed__(self):
         self.exhaust()
         # TODO(pxeger): must this return an iterator specifically, not just an iterable?
-        return type(self)(reversed(self.cache))
+        return type(self)(reversed(self._whole_cache()))._with_length(len(self.cache))._inherit(self)
 
     def __len__(self):
-        self.exhaust()
-        return len(self.cache)
+        length = self._known_length()
+        if length is None:
+            self.exhaust()
+            length = self._offset + len(self.cache)
+        return length
+
+    def __length_hint__(self):
+        length = self._known_length()
+        if length is None:
+            return max(self._offset + len(self.cache), self._min_length)
+        return length
+
+    def _known_length(self):
+        # length of self if it can be determined without any evaluation, else None
+        if self.finished:
+            return self._offset + len(self.cache)
+        elif self._length is not None:
+            return self._length
+        elif self._view is not None and self._view[0]._known_length() is not None:
+            return len(self._view_range())
+        else:
+            return None
 
     def length_compare_length(self, other):
+        length, _ = self._length_bounds(other)
+        if length is not None:
+            return self.length_compare_int(length)
+
         for x, y in itertools.zip_longest(self, other, fillvalue=_fill):
             if x is _fill:
                 # self is shorter than other
@@ -78,20 +410,29 @@ class List:
         return 0
 
     def length_compare_int(self, n: int):
-        return self.length_compare_length(self.nones(n))
+        if n < 0:
+            # a negative length means infinite, as in repeat
+            return self.length_compare_length(self.nones(n))
+
+        length = self._known_length()
+        if length is None:
+            if self._min_length > n or self._force(n):
+                return +1
+            # self has now been exhausted
+            length = self._offset + len(self.cache)
+        return (length > n) - (length < n)
 
     @classmethod
     def nones(cls, length=-1):
         return cls.repeat(None, length)
 
-    @_classmethod_wrap
-    def repeat(value, length=-1):
+    @classmethod
+    def repeat(cls, value, length=-1):
+        # the iterators here are never seen by anything else, so can be evaluated ahead
         if length < 0:
-            while True:
-                yield value
+            return cls.batched(itertools.repeat(value))
         else:
-            for _ in range(length):
-                yield value
+            return cls.batched(itertools.repeat(value, length))._with_length(length)
 
     def __bool__(self):
         return self.length_compare_int(0) > 0
@@ -100,48 +441,139 @@ class List:
         return repr(list(self))
 
     _HASH = 0x4dd3fd4c8ff4e032
+    # number of leading items which contribute to the structural hash; equal Lists always have these in common
+    _HASH_LENGTH = 64
 
     def __hash__(self):
         # hash must never change over the lifecycle of the object
         if self._hash is None:
             if self.finished:
-                self._hash = hash(tuple(self))
+                # the same as the hash of an equal tuple
+                self._hash = hash(tuple(self._whole_cache()))
             else:
                 # can't know whether this object will be equal to any other list object using a hash
                 # so just rely on collision resolution by equality where necessary
                 self._hash = self._HASH
         return self._hash
 
+    def _structural_hash(self):
+        # unlike __hash__, this is always based on the content of self, evaluating it (and any nested Lists) only as far
+        # as necessary, so it can be used to bucket Lists which aren't finished (e.g. in unique)
+        # it's the same as the hash of a tuple of the first _HASH_LENGTH items (with nested Lists likewise)
+        self._force(self._HASH_LENGTH - 1)
+        return hash(tuple(
+            _Hashed(item._structural_hash()) if isinstance(item, List) else item
+            for item in self._whole_cache()[:self._HASH_LENGTH]
+        ))
+
     def __getitem__(self, arg):
         if isinstance(arg, slice):
             return self._slice(arg)
 
-        # fast paths
-        if arg in range(len(self.cache)):
-            return self.cache[arg]
-        elif self.finished:
-            return self.cache[arg % len(self.cache)]
-
-        elif arg < 0:
+        # fast path
+        if 0 <= arg - self._offset < len(self.cache):
+            return self.cache[arg - self._offset]
+
+        length = self._known_length()
+        if length is not None:
+            if not length:
+                raise IndexError("index into empty List")
+            arg %= length
+            if arg < self._offset + len(self.cache):
+                return self._cached(arg)
+
+        if arg >= 0:
+            item = self._random_access(arg)
+            if item is not _fill:
+                return item
+
+        if arg >= 0:
+            # evaluate only as far as necessary
+            if self._force(arg):
+                return self._cached(arg)
+        else:
             # negative index necessitates exhausting iterator
             self.exhaust()
-            return self.cache[arg]
-        else:
-            # this loop allows modular indexing without needing to exhaust self
-            # (with the caveat that this is now O(n) - hence the fast paths above, to avoid that)
-            i = iter(self._loop())
-            for _ in range(arg):
-                next(i)
-            return next(i)
 
-    @_wrap
+        # self is now known to be finite, so use modular indexing
+        length = self._offset + len(self.cache)
+        if not length:
+            raise IndexError("index into empty List")
+        return self._cached(arg % length)
+
+    def _random_access(self, index):
+        # the item at the non-negative index, if it can be found without evaluating self in order, else _fill
+        if self._view is not None:
+            parent, _ = self._view
+            indices = self._view_range()
+            if index < len(indices) and parent._force(indices[index]):
+                return parent._cached(indices[index])
+        elif self._rope is not None:
+            front, front_count, back, back_count = self._rope
+            front_length = front[front_count - 1][1] if front_count else 0
+            back_length = back[back_count - 1][1] if back_count else 0
+            if front_length is None or back_length is None or index >= front_length + back_length:
+                return _fill
+            # front parts are stored innermost first, so count from the join between front and back
+            if index < front_length:
+                j = bisect.bisect_left(front, front_length - index, hi=front_count, key=lambda e: e[1])
+                part, end, _ = front[j]
+                return part[index - (front_length - end)]
+            index -= front_length
+            j = bisect.bisect_right(back, index, hi=back_count, key=lambda e: e[1])
+            return back[j][0][index - (back[j - 1][1] if j else 0)]
+        elif self._unrank is not None:
+            return self._unrank(index)
+        return _fill
+
     def _slice(self, s):
-        if s.step is not None and s.step < 0:
-            # since we have to enumerate all elements anyway, there's no better way than with exhaust
-            self.exhaust()
-            yield from self.cache[s]
+        indices = self._slice_range(s)
+        if indices is None:
+            return self._slice_exhaust(s)
+
+        if self._view is not None:
+            # collapse nested slices into a single view of the underlying List
+            parent, _ = self._view
+            indices = self._view_range()[_range_slice(indices)]
         else:
-            yield from itertools.islice(self, s.start, s.stop, s.step)
+            parent = self
+
+        view = type(self)._raw(parent._view_items(indices))._inherit(self)
+        view._view = (parent, indices)
+        return view
+
+    def _slice_range(self, s):
+        # range of indices selected by the slice s, or None if it can't be determined without exhausting self
+        # unbounded slices of Lists of unknown length extend up to sys.maxsize
+        length = self._known_length()
+        if length is not None:
+            return range(length)[s]
+        start = 0 if s.start is None else s.start
+        stop = sys.maxsize if s.stop is None else s.stop
+        step = 1 if s.step is None else s.step
+        if start >= 0 and stop >= 0 and step > 0:
+            return range(start, stop, step)
+        return None
+
+    def _view_range(self):
+        # range of indices of the parent selected by self, clamped to the parent's length once known
+        parent, indices = self._view
+        length = parent._known_length()
+        if length is not None:
+            return range(length)[_range_slice(indices)]
+        return indices
+
+    def _view_items(self, indices):
+        for i in indices:
+            if not self._force(i):
+                return
+            yield self._cached(i)
+
+    @_wrap
+    def _slice_exhaust(self, s):
+        # since we have to enumerate all elements anyway, there's no better way than with exhaust
+        self.exhaust()
+        yield from self._whole_cache()[s]
 
     def _loop(self):
         while True:
@@ -151,162 +583,176 @@ class List:
 
     # comparison operators are always as lazy as possible
 
-    def __eq__(self, other):
-        # fast path
-        if self is other:
-            return True
-
-        try:
-            other = type(self)(other)
-        except TypeError:
-            return NotImplemented
-
-        try:
-            return all(x == y for x, y in zip(self, other, strict=True))
-        except ValueError:
-            # strict zip failed; lengths were different
-            return False
+    def _compare(self, other, op):
+        # shared implementation of all the comparison operators, with the same semantics as built-in sequences
 
-    def __ne__(self, other):
         # fast path
         if self is other:
-            return False
-
-        try:
-            other = type(self)(other)
-        except TypeError:
-            return NotImplemented
-
-        try:
-            return any(x != y for x, y in zip(self, other, strict=True))
-        except ValueError:
-            # strict zip failed; lengths were different
-            return True
+            return op(0, 0)
 
-    def __lt__(self, other):
-        # fast path
-        if self is other:
-            return False
-
-        try:
-            other = type(self)(other)
-        except TypeError:
-            return NotImplemented
+        if not isinstance(other, List):
+            try:
+                other = type(self)(other)
+            except TypeError:
+                return NotImplemented
+
+        if op is operator.eq or op is operator.ne:
+            # differing lengths mean self and other can't possibly be equal
+            # (unlike lengths, hashes can't be used for this, because Lists also equal other sequences, e.g. str)
+            length, min_length = self._length_bounds(self)
+            other_length, other_min_length = self._length_bounds(other)
+            if length is not None and length < other_min_length or other_length is not None and other_length < min_length:
+                return op is operator.ne
+
+        if self.finished and other.finished and not self._offset and not other._offset:
+            # everything is already evaluated, so use native comparison
+            cache, other_cache = self.cache, other.cache
+            if type(cache) is not type(other_cache):
+                # e.g. packed arrays don't compare equal to lists
+                cache, other_cache = list(cache), list(other_cache)
+            return op(cache, other_cache)
 
         for x, y in itertools.zip_longest(self, other, fillvalue=_fill):
-            if x is _fill:
-                # self is shorter than other
-                return True
-            elif y is _fill:
-                # other is shorter than self
-                return False
-            elif x < y:
-                return True
-            elif x > y:
-                return False
+            if x is _fill or y is _fill:
+                # one is a prefix of the other, so the shorter one is smaller
+                return op(y is _fill, x is _fill)
+            elif not (x is y or x == y):
+                if op is operator.eq:
+                    return False
+                elif op is operator.ne:
+                    return True
+                else:
+                    return op(x, y)
         # all completely equal
-        return False
-
-    def __le__(self, other):
-        # fast path
-        if self is other:
-            return True
+        return op(0, 0)
 
-        try:
-            other = type(self)(other)
-        except TypeError:
-            return NotImplemented
+    def __eq__(self, other):
+        return self._compare(other, operator.eq)
 
-        for x, y in itertools.zip_longest(self, other, fillvalue=_fill):
-            if x is _fill:
-                # self is shorter than other
-                return True
-            elif y is _fill:
-                # other is shorter than self
-                return False
-            elif x < y:
-                return True
-            elif x > y:
-                return False
-        # all completely equal
-        return True
+    def __ne__(self, other):
+        return self._compare(other, operator.ne)
 
-    def __gt__(self, other):
-        # fast path
-        if self is other:
-            return False
+    def __lt__(self, other):
+        return self._compare(other, operator.lt)
 
-        try:
-            other = type(self)(other)
-        except TypeError:
-            return NotImplemented
+    def __le__(self, other):
+        return self._compare(other, operator.le)
 
-        for x, y in itertools.zip_longest(self, other, fillvalue=_fill):
-            if x is _fill:
-                # self is shorter than other
-                return False
-            elif y is _fill:
-                # other is shorter than self
-                return True
-            elif x < y:
-                return False
-            elif x > y:
-                return True
-        # all completely equal
-        return False
+    def __gt__(self, other):
+        return self._compare(other, operator.gt)
 
     def __ge__(self, other):
-        # fast path
-        if self is other:
-            return True
-
-        try:
-            other = type(self)(other)
-        except TypeError:
-            return NotImplemented
+        return self._compare(other, operator.ge)
 
-        for x, y in itertools.zip_longest(self, other, fillvalue=_fill):
-            if x is _fill:
-                # self is shorter than other
-                return False
-            elif y is _fill:
-                # other is shorter than self
-                return True
-            elif x < y:
-                return False
-            elif x > y:
-                return True
-        # all completely equal
-        return True
+    def substitute(self, target_index, replacement):
+        return self._substitute(target_index, replacement)._with_length_of(self)
 
     @_wrap
-    def substitute(self, target_index, replacement):
+    def _substitute(self, target_index, replacement):
         for i, x in enumerate(self):
             if i == target_index:
                 yield replacement
             else:
                 yield x
 
-    @_wrap
+    # concatenations are represented as ropes of parts, so that long chains of them are flattened instead of nesting
+    # a rope is stored as (front, front_count, back, back_count): the parts are front[:front_count] in reverse, followed
+    # by back[:back_count], and front and back are shared between ropes, so pushing a part is usually O(1)
+
+    @staticmethod
+    def _rope_push(entries, count, part):
+        # push part onto the end of entries[:count], returning the new entries and count
+        if count != len(entries):
+            # another rope has already pushed past count, so entries can't be shared
+            entries = entries[:count]
+        end, min_end = entries[-1][1:] if entries else (0, 0)
+        length, min_length = List._length_bounds(part)
+        # each entry records the total (exact and minimum) length of the parts up to and including it
+        entries.append((part, None if end is None or length is None else end + length, min_end + min_length))
+        return entries, count + 1
+
+    def _rope_parts(self):
+        # the rope for self, which is just self if it isn't already a rope
+        if self._rope is not None:
+            return self._rope
+        return ([], 0, *self._rope_push([], 0, self))
+
+    def _rope_new(self, front, front_count, back, back_count):
+        def items():
+            for i in range(front_count - 1, -1, -1):
+                yield front[i][0]
+            for i in range(back_count):
+                yield back[i][0]
+
+        result = type(self)._raw(itertools.chain.from_iterable(items()))._inherit(self)
+        result._rope = front, front_count, back, back_count
+        front_length, front_min = front[front_count - 1][1:] if front_count else (0, 0)
+        back_length, back_min = back[back_count - 1][1:] if back_count else (0, 0)
+        if front_length is None or back_length is None:
+            return result._with_length(None, front_min + back_min)
+        return result._with_length(front_length + back_length)
+
+    def _rope_part(self, other):
+        # other as a re-iterable part whose items are suitable for self
+        return other if isinstance(other, type(self)) else type(self)(other)
+
     def insert(self, index, value):
-        yield from self[:index]
-        yield value
-        yield from self[index:]
+        item = (self._item(value),)
+        if self._rope is not None and index >= 0:
+            # split the part of the rope which index falls in, so that the result is still a single flat rope, instead
+            # of views of self (which would nest through every earlier insert)
+            front, front_count, back, back_count = self._rope
+            parts = [front[i][0] for i in range(front_count - 1, -1, -1)] + [back[i][0] for i in range(back_count)]
+            start = 0
+            for j, part in enumerate(parts):
+                length, _ = self._length_bounds(part)
+                if length is None:
+                    break
+                elif index <= start + length:
+                    split = index - start
+                    pieces = [item]
+                    if split > 0:
+                        pieces.insert(0, part[:split])
+                    if split < length:
+                        pieces.append(part[split:])
+                    parts[j:j + 1] = pieces
+                    return self._rope_from(parts)
+                start += length
+            else:
+                return self._rope_from(parts + [item])
+
+        return self._rope_from([self[:index], item, self[index:]])
+
+    def _rope_from(self, parts):
+        # new rope of the parts, in order
+        back, back_count = [], 0
+        for part in parts:
+            back, back_count = self._rope_push(back, back_count, part)
+        return self._rope_new([], 0, back, back_count)
 
-    @_wrap
     def append(self, value):
-        yield from self
-        yield value
+        front, front_count, back, back_count = self._rope_parts()
+        back, back_count = self._rope_push(back, back_count, (self._item(value),))
+        return self._rope_new(front, front_count, back, back_count)
 
-    @_wrap
     def prepend(self, value):
-        yield value
-        yield from self
+        front, front_count, back, back_count = self._rope_parts()
+        front, front_count = self._rope_push(front, front_count, (self._item(value),))
+        return self._rope_new(front, front_count, back, back_count)
 
-    @_wrap
     def extend(self, other):
-        yield from self
-        yield from other
+        front, front_count, back, back_count = self._rope_parts()
+        other = self._rope_part(other)
+        if other._rope is None:
+            back, back_count = self._rope_push(back, back_count, other)
+        else:
+            # flatten other's parts into self's
+            other_front, other_front_count, other_back, other_back_count = other._rope
+            for i in range(other_front_count - 1, -1, -1):
+                back, back_count = self._rope_push(back, back_count, other_front[i][0])
+            for i in range(other_back_count):
+                back, back_count = self._rope_push(back, back_count, other_back[i][0])
+        return self._rope_new(front, front_count, back, back_count)
 
     @_classmethod_wrap
     def chain(*iterables):
@@ -314,15 +760,19 @@ class List:
             yield from i
 
     @_wrap
-    def flat(self, maxdepth=-1):
-        if maxdepth == 0:
-            yield from self
-            return
-        for i in self:
-            if isinstance(i, List):
-                yield from i.flat(maxdepth - 1)
+    def flat(self, maxdepth=-1, atoms=()):
+        # Lists which are instances of atoms (e.g. String) are items in their own right, so aren't flattened
+        # walks an explicit stack of iterators, one per level, so items are yielded straight from here however deeply
+        # they're nested
+        stack = [iter(self)]
+        while stack:
+            for item in stack[-1]:
+                if isinstance(item, List) and not isinstance(item, atoms) and len(stack) - 1 != maxdepth:
+                    stack.append(iter(item))
+                    break
+                yield item
             else:
-                yield i
+                stack.pop()
 
     @_wrap
     def prefixes(self, include_empty: bool):
@@ -334,28 +784,72 @@ class List:
             length += 1
             yield List(item for _, item in zip(range(length), self))
 
-    @_wrap
+    def _scan_substrings(self, pattern, maxcount=-1):
+        # Knuth-Morris-Pratt search in a single lazy pass over self, Θ(n + m)
+        # yields every item of self that is not part of a match, and _match in place of each (non-overlapping) match
+        # only the current partial match (at most m items) is ever buffered
+        # after maxcount matches, the rest of self is passed through untouched
+        pattern = list(pattern)
+        it = iter(self)
+        if maxcount == 0:
+            yield from it
+            return
+
+        if not pattern:
+            yield _match
+            for item in it:
+                yield item
+                maxcount -= 1
+                if maxcount == 0:
+                    yield from it
+                    return
+                yield _match
+            return
+
+        # failure[k] is the length of the longest proper border of pattern[:k]
+        failure = [0] * (len(pattern) + 1)
+        k = 0
+        for i in range(1, len(pattern)):
+            while k > 0 and pattern[i] != pattern[k]:
+                k = failure[k]
+            if pattern[i] == pattern[k]:
+                k += 1
+            failure[i + 1] = k
+
+        buffer = collections.deque()
+        for item in it:
+            k = len(buffer)
+            while k > 0 and item != pattern[k]:
+                # fall back to the longest border; items which fall out of the partial match can't be part of one
+                k = failure[k]
+                while len(buffer) > k:
+                    yield buffer.popleft()
+            if item == pattern[k]:
+                buffer.append(item)
+                if len(buffer) == len(pattern):
+                    # matches never overlap, so start again from scratch
+                    buffer.clear()
+                    yield _match
+                    maxcount -= 1
+                    if maxcount == 0:
+                        yield from it
+                        return
+            else:
+                yield item
+        yield from buffer
+
+    @_wrap_list
     def find_substrings(self, pattern):
-        # naïve substring search, Θ(mn), but it's not easy to get better when you have to be lazy
-        pattern = type(self)(pattern)
+        pattern = list(pattern)
         i = 0
-        while True:
-            iterator = iter(self)
-            try:
-                for _ in range(i):
-                    next(iterator)
-            except StopIteration:
-                break
-            for item in pattern:
-                if next(iterator, _fill) != item:
-                    i += 1
-                    break
-            else:
-                # did not break; all were equal
+        for item in self._scan_substrings(pattern):
+            if item is _match:
                 yield i
-                i += max(1, len(pattern))
+                i += len(pattern)
+            else:
+                i += 1
 
-    @_wrap
+    @_wrap_list
     def find(self, pattern):
         for i, x in enumerate(self):
             if x == pattern:
@@ -374,16 +868,11 @@ class List:
             yield from self
             return
 
-        prev = 0
-        for index in self.find_substrings(pattern):
-            yield from self[prev:index]
-            yield from replacement
-            prev = index + len(pattern)
-            if maxcount > 0:
-                maxcount -= 1
-                if maxcount == 0:
-                    break
-        yield from self[prev:]
+        for item in self._scan_substrings(pattern, maxcount):
+            if item is _match:
+                yield from replacement
+            else:
+                yield item
 
     @_wrap
     def replace(self, find, replacement, maxcount=-1):
@@ -394,25 +883,116 @@ class List:
             yield from self
             return 0
 
-        for i in self:
+        it = iter(self)
+        for i in it:
             if i == find:
                 yield replacement
                 if maxcount > 0:
                     maxcount -= 1
                     if maxcount == 0:
-                        yield from self
+                        yield from it
                         return 0
             else:
                 yield i
 
+    # chains of map and filter are fused into a single iterator over the original source, so intermediate Lists don't
+    # cache anything unless they're actually evaluated themselves
+    # (if they are, their stages are computed separately from any later ones)
+
+    def _unevaluated_pipeline(self):
+        # the (source, stages) of self, if it hasn't been evaluated yet so can be fused with further stages, else None
+        if self._pipeline is not None and not self.cache and not self.finished:
+            return self._pipeline
+        return None
+
+    @staticmethod
+    def _run_pipeline(source, stages):
+        it = iter(source)
+        for kind, function, iterables in stages:
+            it = kind(function, it, *iterables)
+        return it
+
+    def _pipe(self, cls, kind, function, iterables=()):
+        # new cls which applies the stage kind(function, ..., *iterables) to self, where kind is map or filter
+        source, stages = self._unevaluated_pipeline() or (self, ())
+        stages += ((kind, function, iterables),)
+        result = cls._raw(self._run_pipeline(source, stages))._inherit(self)
+        result._pipeline = source, stages
+        return result
+
+    def map(self, function, *iterables):
+        # like the built-in map, the result ends with the shortest of self and iterables
+        iterables = tuple(i if isinstance(i, List) else List(i) for i in iterables)
+        result = self._pipe(List, map, function, iterables)
+        bounds = [self._length_bounds(i) for i in (self, *iterables)]
+        lengths = [length for length, _ in bounds if length is not None]
+        return result._with_length(
+            min(lengths) if len(lengths) == len(bounds) else None,
+            min(min_length for _, min_length in bounds),
+        )
+
+    def filter(self, function=None):
+        return self._pipe(type(self), filter, function)
+
+    def zip(self, *iterables):
+        return self.map(_zipped, *iterables)
+
+    def pmap(self, function, executor=None, prefetch=None):
+        # like map, but calls function in parallel, using the concurrent.futures executor (or a new thread pool)
+        # at most prefetch items are submitted beyond the one currently being consumed, so it also works for infinite
+        # Lists, but results are still in order
+        if prefetch is None:
+            prefetch = 2 * (os.cpu_count() or 1)
+        elif prefetch < 1:
+            raise ValueError("prefetch must be positive")
+        return self._pmap(function, executor, prefetch)._with_length_of(self)
+
+    @_wrap_list
+    def _pmap(self, function, executor, prefetch):
+        owned = executor is None
+        if owned:
+            executor = concurrent.futures.ThreadPoolExecutor()
+        it = iter(self)
+        pending = collections.deque(executor.submit(function, item) for item in itertools.islice(it, prefetch))
+        try:
+            while pending:
+                result = pending.popleft().result()
+                # replace the one just taken, to keep prefetch in flight
+                for item in itertools.islice(it, 1):
+                    pending.append(executor.submit(function, item))
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
+            if owned:
+                executor.shutdown(wait=False)
+
+    def reduce(self, function, initial=_fill):
+        # evaluating an unevaluated pipeline directly means none of its items need to be cached
+        pipeline = self._unevaluated_pipeline()
+        it = iter(self) if pipeline is None else self._run_pipeline(*pipeline)
+        if initial is _fill:
+            return functools.reduce(function, it)
+        return functools.reduce(function, it, initial)
+
     @_wrap
     def unique(self):
         known = []
         # optimisation for hashable items
         known_fast = set()
+        # Lists and tuples (which can be equal to each other), bucketed by the hash of their first _HASH_LENGTH items,
+        # which (unlike __hash__) is never a placeholder
+        known_sequences = {}
         for item in self:
             try:
-                if item in known_fast:
+                if isinstance(item, (List, tuple)):
+                    key = item._structural_hash() if isinstance(item, List) else hash(item[:self._HASH_LENGTH])
+                    bucket = known_sequences.setdefault(key, [])
+                    if item in bucket:
+                        continue
+                    else:
+                        bucket.append(item)
+                elif item in known_fast:
                     continue
                 else:
                     known_fast.add(item)
@@ -424,54 +1004,159 @@ class List:
 
             yield item
 
+    # combinatorial Lists are in lexicographic order of the indices of the items chosen, which means (as long as enough
+    # is known about the lengths of the inputs) the item at any index can be found directly, by unranking it
+    # iterating over them only keeps track of the current indices
+
     @classmethod
-    def product(cls, *iterables):
-        def closure_hack(result, iterable):
-            # by defining result and iterable as parameters to an inner function, they won't be closed over
-            return ((*xs, y) for xs in result for y in iterable)
+    def product(cls, *iterables, fair=False):
+        # with fair, tuples are instead in order of the sum of their indices, so that every one is eventually reached even
+        # when the factors are infinite
+        factors = [i if isinstance(i, cls) else cls(i) for i in iterables]
+        lengths = [factor._known_length() for factor in factors]
+        length = None if None in lengths else math.prod(lengths)
+        result = cls._raw(cls._fair_product(factors) if fair else cls._product(factors))._with_length(length)
+        # stream, and be thread-safe, if any of the factors do
+        for factor in factors:
+            result._inherit(factor)
+        if fair:
+            return result
+
+        def unrank(index):
+            # mixed radix, where the first factor is the most significant digit, so only needs to be long enough
+            indices = []
+            for factor in reversed(factors[1:]):
+                length = factor._known_length()
+                if length is None:
+                    return _fill
+                index, i = divmod(index, length)
+                indices.append(i)
+            if not factors:
+                return cls(()) if index == 0 else _fill
+            if not factors[0]._force(index):
+                return _fill
+            indices.append(index)
+            return cls([factor[i] for factor, i in zip(factors, reversed(indices))])
+
+        result._unrank = unrank
+        return result
+
+    @classmethod
+    def _product(cls, factors):
+        if not all(factor._force(0) for factor in factors):
+            return
+        # an odometer, where the last factor moves fastest
+        indices = [0] * len(factors)
+        while True:
+            yield cls([factor[i] for factor, i in zip(factors, indices)])
+            j = len(factors) - 1
+            while j >= 0:
+                indices[j] += 1
+                if factors[j]._force(indices[j]):
+                    break
+                indices[j] = 0
+                j -= 1
+            else:
+                return
 
-        result = ((),)
-        for iterable in iterables:
-            result = cls(closure_hack(result, cls(iterable)))
-        # wrap each tuple in a List (or, well, a cls)
-        return cls(cls(t) for t in result)
+    @classmethod
+    def _fair_product(cls, factors):
+        if not all(factor._force(0) for factor in factors):
+            return
 
-    def power(self, power):
-        return self.product(*(self for _ in range(power)))
+        def diagonal(j, total):
+            # indices into factors[j:] which add up to total, evaluating each factor only as far as they need
+            if j == len(factors) - 1:
+                if factors[j]._force(total):
+                    yield (total,)
+                return
+            i = 0
+            while i <= total and factors[j]._force(i):
+                for rest in diagonal(j + 1, total - i):
+                    yield (i, *rest)
+                i += 1
 
-    @_wrap
-    def combinations(self, size):
-        if size <= 0:
+        if not factors:
+            yield cls(())
             return
-        result = [None] * size
-        stack = [0]
-        while stack:
-            result_index = len(stack) - 1
-            input_index = stack.pop()
-            while self.length_compare_int(input_index) == 1:
-                result[result_index] = self[input_index]
-                result_index += 1
-                input_index += 1
-                stack.append(input_index)
-                if result_index == size:
-                    yield List(result)
-                    break
+        for total in itertools.count():
+            # every factor is needed up to index total on this diagonal anyway, and once none of them reach it, they're
+            # all finished, so the last diagonal is known
+            if not any(factor._force(total) for factor in factors) and total > sum(map(len, factors)) - len(factors):
+                return
+            for indices in diagonal(0, total):
+                yield cls([factor[i] for factor, i in zip(factors, indices)])
+
+    def power(self, power, fair=False):
+        # (inheriting from self even when there are no factors)
+        return self.product(*(self for _ in range(power)), fair=fair)._inherit(self)
+
+    def combinations(self, size):
+        length = self._known_length()
+        if length is not None:
+            length = math.comb(length, size) if size > 0 else 0
+        result = self._combinations(size)._with_length(length)
+
+        def unrank(index):
+            # combinatorial number system: skip past all the combinations starting with each earlier item in turn
+            length = self._known_length()
+            if size <= 0 or length is None or index >= math.comb(length, size):
+                return _fill
+            indices = []
+            i = 0
+            for remaining in range(size, 0, -1):
+                while index >= (count := math.comb(length - i - 1, remaining - 1)):
+                    index -= count
+                    i += 1
+                indices.append(i)
+                i += 1
+            return List([self[i] for i in indices])
+
+        result._unrank = unrank
+        return result
 
     @_wrap
+    def _combinations(self, size):
+        if size <= 0 or not self._force(size - 1):
+            return
+        indices = list(range(size))
+        while True:
+            yield List([self[i] for i in indices])
+            # find the last index which can move along while leaving enough items for the ones after it
+            j = size - 1
+            while j >= 0 and not self._force(indices[j] + size - j):
+                j -= 1
+            if j < 0:
+                return
+            indices[j] += 1
+            indices[j + 1:] = range(indices[j] + 1, indices[j] + size - j)
+
     def powerset(self):
-        yield List()
-        acc = [List()]
-        for x in self:
-            new = [a.append(x) for a in acc]
-            yield from new
-            acc += new
+        length = self._known_length()
+        result = self._powerset()._with_length(None if length is None else 2 ** length)
+        result._unrank = self._subset
+        return result
 
-    @_classmethod_wrap
-    def integers(start: int = 0):
-        n = start
-        while True:
-            yield n
-            n += 1
+    @_wrap
+    def _powerset(self):
+        for index in itertools.count():
+            # each new highest bit brings in the next item
+            if index & (index - 1) == 0 and index and not self._force(index.bit_length() - 1):
+                return
+            yield self._subset(index)
+
+    def _subset(self, index):
+        # the subset of self whose items are the set bits of index
+        if index and not self._force(index.bit_length() - 1):
+            return _fill
+        return List([self[i] for i in range(index.bit_length()) if index >> i & 1])
+
+    @classmethod
+    def integers(cls, start: int = 0):
+        self = cls.packed(itertools.count(start))
+        # like batched, since nothing else sees the counter
+        self._batch = self._BATCH
+        return self
 
     @_wrap
     def lstrip(self, remove):
@@ -484,27 +1169,146 @@ class List:
                     start = False
             yield item
 
+    @_wrap
     def rstrip(self, remove):
-        return reversed(reversed(self).lstrip(remove))
+        yield from self._rstrip(self, remove)
 
+    @_wrap
     def strip(self, remove):
-        return self.lstrip(remove).rstrip(remove)
+        yield from self._rstrip(itertools.dropwhile(lambda item: item in remove, self), remove)
 
-    @_wrap
-    def split(self, delimiters):
+    @staticmethod
+    def _rstrip(items, remove):
+        # in a single pass, only buffering the current run of removable items until it turns out not to be at the end
+        run = []
+        for item in items:
+            if item in remove:
+                run.append(item)
+            else:
+                yield from run
+                run.clear()
+                yield item
+
+    @staticmethod
+    def _lookup(pairs):
+        # function from an item to the value paired with a key equal to it in the finite pairs (or None), which looks
+        # keys up by hash where possible instead of comparing against each of them
+        # Lists (whose hashes aren't comparable with those of other sequences) and unhashable keys are always compared,
+        # as is everything when looking up Lists and unhashable items
+        pairs = list(pairs)
+        hashed = {}
+        compared = []
+        for key, value in pairs:
+            if isinstance(key, List):
+                compared.append((key, value))
+            else:
+                try:
+                    hashed.setdefault(key, value)
+                except TypeError:
+                    compared.append((key, value))
+
+        def get(item):
+            candidates = pairs
+            if not isinstance(item, List):
+                try:
+                    if item in hashed:
+                        return hashed[item]
+                    candidates = compared
+                except TypeError:
+                    pass
+            return next((value for key, value in candidates if key == item), None)
+
+        return get
+
+    def _split(self, scanned):
+        # the pieces of self between each _match in scanned, which is a single lazy pass over self
         cls = type(self)
-        it = iter(self)
+        it = iter(scanned)
         done = False
 
         def g():
             nonlocal done
             for item in it:
-                if item in delimiters:
-                    break
-                else:
-                    yield item
-            else:
-                done = True
+                if item is _match:
+                    return
+                yield item
+            done = True
 
         while not done:
-            yield cls(g())
+            piece = cls(g())._inherit(self)
+            yield piece
+            # the next piece only starts where this one ends
+            piece.exhaust()
+
+    _split_scanned = _wrap_list(_split)
+
+    def split(self, delimiters):
+        is_delimiter = self._lookup((delimiter, True) for delimiter in delimiters)
+        return self._split_scanned(_match if is_delimiter(item) else item for item in self)
+
+    def split_substrings(self, patterns):
+        # like split, but on any of several sublists instead of single items
+        patterns = [list(pattern) for pattern in patterns]
+        if not all(patterns):
+            raise ValueError("empty delimiter")
+        if len(patterns) == 1:
+            return self._split_scanned(self._scan_substrings(patterns[0]))
+        return self._split_scanned(self._scan_multiple_substrings(patterns))
+
+    def _scan_multiple_substrings(self, patterns):
+        # Aho-Corasick search for any of the (non-empty) patterns in a single lazy pass over self, Θ(n + Σm)
+        # like _scan_substrings, yields _match in place of each (non-overlapping) match; matches are found as soon as
+        # they end, so where they overlap, the one which ends first wins (and of those, the longest)
+        # only the current partial match (at most max(m) items) is ever buffered
+
+        # build the trie of patterns: the outgoing edges of, and the number of items leading to, each node, and the
+        # length of the pattern ending there (or 0)
+        edges, depth, found = [[]], [0], [0]
+        for pattern in patterns:
+            node = 0
+            for item in pattern:
+                child = next((child for key, child in edges[node] if key == item), None)
+                if child is None:
+                    child = len(edges)
+                    edges[node].append((item, child))
+                    edges.append([])
+                    depth.append(depth[node] + 1)
+                    found.append(0)
+                node = child
+            found[node] = len(pattern)
+        goto = [self._lookup(e) for e in edges]
+
+        # failure[node] is the node for the longest proper suffix of the items leading to node which is also in the
+        # trie; nodes are numbered so that each comes after its parent, so a breadth-first order visits them by depth
+        failure = [0] * len(edges)
+        for node in sorted(range(len(edges)), key=depth.__getitem__):
+            for item, child in edges[node]:
+                if node:
+                    k = failure[node]
+                    while (suffix := goto[k](item)) is None and k:
+                        k = failure[k]
+                    failure[child] = suffix or 0
+                # the longest pattern ending at child is either its own, or the longest ending at its failure
+                found[child] = found[child] or found[failure[child]]
+
+        buffer = collections.deque()
+        node = 0
+        for item in self:
+            while (child := goto[node](item)) is None and node:
+                # fall back to the longest suffix; items which fall out of the partial match can't be part of one
+                node = failure[node]
+                while len(buffer) > depth[node]:
+                    yield buffer.popleft()
+            if child is None:
+                yield item
+                continue
+            node = child
+            buffer.append(item)
+            if found[node]:
+                # matches never overlap, so start again from scratch
+                while len(buffer) > found[node]:
+                    yield buffer.popleft()
+                buffer.clear()
+                yield _match
+                node = 0
+        yield from buffer
@@ -1,15 +1,39 @@
+import collections.abc
+import functools
+import itertools
+import operator
+
 from libgolf.list import List
 
 
 class Character(str):
     def __new__(cls, arg):
         if isinstance(arg, int):
+            if cls is Character and 0 <= arg < len(_LATIN_1):
+                return _LATIN_1[arg]
             arg = chr(arg)
+        # Characters are interned (see _character), except those of subclasses
+        if cls is Character:
+            if type(arg) is Character:
+                # already immutable
+                return arg
+            elif type(arg) is str and len(arg) == 1:
+                return _character(arg)
         c = super().__new__(cls, arg)
         if len(c) != 1:
             raise ValueError("character must be of length 1")
         return c
 
+    @classmethod
+    def chars(cls, s):
+        # iterator of the Characters of the str s, in bulk
+        if cls is not Character:
+            return map(cls, s)
+        try:
+            return map(_LATIN_1.__getitem__, s.encode("latin-1"))
+        except UnicodeEncodeError:
+            return map(_character, s)
+
     def __int__(self):
         return ord(self)
 
@@ -19,14 +43,147 @@ class Character(str):
     __mul__ = __rmul__ = __radd__ = __mod__ = __add__
 
 
+# shared instances of Character: all of Latin-1 up front, and the most recently used of everything else
+_LATIN_1 = [str.__new__(Character, chr(i)) for i in range(256)]
+
+
+@functools.lru_cache(maxsize=4096)
+def _intern(c):
+    return str.__new__(Character, c)
+
+
+# the final sigma rule of str.lower maps "Σ" to "ς" when the nearest characters either side of it which aren't
+# case-ignorable are, respectively, cased and not cased (or absent); these find out those properties from str.lower itself
+
+
+@functools.lru_cache(maxsize=4096)
+def _case_ignorable(c):
+    return ("AΣ" + c + "B").lower()[1] == "σ" and ("1" + c + "Σ").lower()[-1] == "σ"
+
+
+@functools.lru_cache(maxsize=4096)
+def _cased(c):
+    # (only for characters which aren't case-ignorable)
+    return ("1" + c + "Σ").lower()[-1] == "ς"
+
+
+def _character(c):
+    # the shared Character for the str c, which must be of length 1
+    code = ord(c)
+    return _LATIN_1[code] if code < len(_LATIN_1) else _intern(c)
+
+
+class _Characters(collections.abc.Sequence):
+    # cache for a finished String, which stores it as a native str and only creates Characters on access
+    __slots__ = ("str",)
+
+    def __init__(self, s):
+        self.str = s
+
+    def __len__(self):
+        return len(self.str)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return _Characters(self.str[index])
+        return _character(self.str[index])
+
+    def __iter__(self):
+        return Character.chars(self.str)
+
+    def __reversed__(self):
+        return Character.chars(self.str[::-1])
+
+    def _compare(self, other, op):
+        if isinstance(other, _Characters):
+            return op(self.str, other.str)
+        return NotImplemented
+
+    def __eq__(self, other):
+        return self._compare(other, operator.eq)
+
+    def __lt__(self, other):
+        return self._compare(other, operator.lt)
+
+    def __le__(self, other):
+        return self._compare(other, operator.le)
+
+    def __gt__(self, other):
+        return self._compare(other, operator.gt)
+
+    def __ge__(self, other):
+        return self._compare(other, operator.ge)
+
+
 class String(List):
     _HASH = 0x9f6366ef3114f318
 
+    _item = Character
+
     def __init__(self, arg=()):
-        super().__init__(Character(c) for c in arg)
+        if isinstance(arg, str):
+            super().__init__()
+            self.cache = _Characters(str.__str__(arg))
+            self.finished = True
+        elif isinstance(arg, String) and isinstance(arg.cache, _Characters):
+            # finished Strings are immutable, so the storage can be shared
+            super().__init__()
+            self.cache = arg.cache
+            self.finished = True
+        else:
+            super().__init__(map(self._item, arg))
+            self._with_length(*self._length_bounds(arg))
+            if self._pure(arg):
+                self._batch = self._BATCH
 
     def __str__(self):
-        return "".join(self)
+        self.exhaust()
+        if not isinstance(self.cache, _Characters):
+            # switch to the more compact storage now that self is finished
+            self.cache = _Characters("".join(self._whole_cache()))
+        return self.cache.str
+
+    def _native(self, other):
+        # other as a native str, if it's a str or a finished String, else None
+        if isinstance(other, str):
+            return other
+        elif isinstance(other, String) and other.finished:
+            return str(other)
+        else:
+            return None
+
+    # when everything is finished, use the much faster native str implementations of searching etc.
+
+    def find_substrings(self, pattern):
+        native_pattern = self._native(pattern)
+        if not self.finished or native_pattern is None:
+            return super().find_substrings(pattern)
+
+        def find(s):
+            i = s.find(native_pattern)
+            while i != -1:
+                yield i
+                i = s.find(native_pattern, i + max(1, len(native_pattern)))
+
+        return List(find(str(self)))
+
+    def replace_substrings(self, pattern, replacement, maxcount=-1):
+        native_pattern, native_replacement = self._native(pattern), self._native(replacement)
+        if not self.finished or native_pattern is None or native_replacement is None:
+            return super().replace_substrings(pattern, replacement, maxcount)
+        return String(str(self).replace(native_pattern, native_replacement, maxcount))
+
+    def split(self, delimiters):
+        native_delimiters = self._native(delimiters)
+        if not self.finished or native_delimiters is None:
+            return super().split(delimiters)
+        s = str(self)
+        if native_delimiters:
+            # split on every delimiter at once, by first replacing them all with the same one
+            first = native_delimiters[0]
+            s = s.translate({ord(c): first for c in native_delimiters})
+            return List(map(String, s.split(first)))
+        return List((self,))
 
     def __repr__(self):
         return repr(str(self))
@@ -37,10 +194,63 @@ class String(List):
     def __format__(self, spec):
         return format(str(self), spec)
 
-    @List._wrap
+    def _case_map(self, function, contextual=False):
+        # apply the str method function to the whole of self, which (unlike applying it to each Character) also handles
+        # mappings to multiple characters, like "ß".upper() == "SS"
+        # contextual is whether function maps some characters differently depending on their neighbours
+        if self.finished:
+            return String(function(str(self)))
+        return String._raw(self._case_map_chunks(function, contextual))._inherit(self)
+
+    def _case_map_chunks(self, function, contextual):
+        # unfinished Strings are mapped a chunk at a time, with chunks growing geometrically so that they are evaluated
+        # no more than twice as far as necessary
+        # for contextual mappings (i.e. the final sigma in lower), each chunk is mapped between stand-ins for the
+        # nearest characters before and after it which aren't case-ignorable, and a trailing sigma is held back until
+        # such a character after it is known
+        it = iter(self)
+        size = 1
+        pending = ""
+        before = ""
+        while new := "".join(itertools.islice(it, size)):
+            pending += new
+            end = self._unresolved_sigma(pending) if contextual else len(pending)
+            if end:
+                chunk, pending = pending[:end], pending[end:]
+                # the held back sigma is cased
+                yield from Character.chars(self._map_between(function, before, chunk, "A" if pending else ""))
+                if contextual:
+                    before = self._context_before(chunk, before)
+            size = min(2 * size, self._CASE_MAP_CHUNK)
+        yield from Character.chars(self._map_between(function, before, pending, ""))
+
+    _CASE_MAP_CHUNK = 4096
+
+    @staticmethod
+    def _unresolved_sigma(s):
+        # the index of a sigma in s which is only followed by case-ignorable characters, so can't be mapped yet, else
+        # len(s)
+        i = len(s) - 1
+        while i >= 0 and _case_ignorable(s[i]):
+            i -= 1
+        return i if i >= 0 and s[i] == "Σ" else len(s)
+
+    @staticmethod
+    def _map_between(function, before, s, after):
+        # function(s), as if s were between the (already mapped, or yet to be mapped) strs before and after
+        mapped = function(before + s + after)
+        return mapped[len(function(before)):len(mapped) - len(function(after))]
+
+    @staticmethod
+    def _context_before(s, before):
+        # stand-in for the nearest character which isn't case-ignorable at the end of s, after before
+        for c in reversed(s):
+            if not _case_ignorable(c):
+                return "A" if _cased(c) else " "
+        return before
+
     def lower(self):
-        return (c.lower() for c in self)
+        return self._case_map(str.lower, contextual=True)
 
-    @List._wrap
     def upper(self):
-        return (c.upper() for c in self)
+        return self._case_map(str.upper)
@@ -1,11 +1,175 @@
+import array
+import functools
+import inspect
+import itertools
+import operator
+
 from libgolf.list import List
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# operators with numpy ufuncs that give identical results (subject to the checks in _vectorise_numpy)
+_UFUNCS = {
+    operator.add: "add",
+    operator.sub: "subtract",
+    operator.mul: "multiply",
+    operator.truediv: "true_divide",
+    operator.floordiv: "floor_divide",
+    operator.mod: "remainder",
+    operator.neg: "negative",
+    operator.abs: "absolute",
+    operator.eq: "equal",
+    operator.ne: "not_equal",
+    operator.lt: "less",
+    operator.le: "less_equal",
+    operator.gt: "greater",
+    operator.ge: "greater_equal",
+}
+_DIVISIONS = {operator.truediv, operator.floordiv, operator.mod}
+# ints are only passed to numpy if they're small enough that no operation can overflow or lose precision
+_INT_LIMIT = 2 ** 31
+
+
+def _numpy_array(arg):
+    # arg (a finished List) as a numpy array of int64 or float64, or None if its items aren't all ints or all floats
+    if type(arg.cache) is array.array:
+        return numpy.frombuffer(arg.cache, dtype=numpy.int64 if arg.cache.typecode == "q" else numpy.float64)
+    types = {*map(type, arg.cache)}
+    if types == {int}:
+        try:
+            return numpy.array(arg.cache, dtype=numpy.int64)
+        except OverflowError:
+            return None
+    elif types == {float} or not types:
+        return numpy.array(arg.cache, dtype=numpy.float64)
+    else:
+        return None
+
 
-def vectorise(function):
-    def inner(*args):
-        if not any(isinstance(arg, List) for arg in args):
-            return function(*args)
+def _vectorise_numpy(function, args):
+    # vectorise function over args as a single numpy operation, or return None if that isn't possible
+    length = None
+    operands = []
+    for arg in args:
+        if isinstance(arg, List):
+            if not arg.finished or arg._offset:
+                # (streaming Lists only have the last few items in their cache)
+                return None
+            operand = _numpy_array(arg)
+            if operand is None:
+                return None
+            length = len(operand) if length is None else min(length, len(operand))
+            # (checking both bounds, since numpy.abs overflows for the most negative int64)
+            if operand.dtype == numpy.int64 and len(operand) and not (
+                operand.min() > -_INT_LIMIT and operand.max() < _INT_LIMIT
+            ):
+                return None
+        elif type(arg) is int:
+            if abs(arg) >= _INT_LIMIT:
+                return None
+            operand = arg
+        elif type(arg) is float:
+            operand = arg
         else:
-            args = (arg if isinstance(arg, List) else List.repeat(arg) for arg in args)
-            return List(map(inner, *args))
+            return None
+        operands.append(operand)
+
+    # like map, stop at the end of the shortest List
+    operands = [operand[:length] if isinstance(operand, numpy.ndarray) else operand for operand in operands]
+    if function in _DIVISIONS and numpy.any(operands[-1] == 0):
+        # leave it to function to raise ZeroDivisionError
+        return None
+    # like Python's float operations, overflow and invalid results (e.g. inf - inf) silently give inf or nan
+    with numpy.errstate(all="ignore"):
+        result = getattr(numpy, _UFUNCS[function])(*operands)
+    return List.packed(result.tolist())
+
+
+def _deeper(x, rank):
+    # whether x is a List nested more than rank levels deep, judging only by the first item at each level, so that it
+    # doesn't evaluate all of x (which might be infinite)
+    for _ in range(rank):
+        if not isinstance(x, List) or not x._force(0):
+            return False
+        x = x[0]
+    return isinstance(x, List)
+
+
+def _arity(function):
+    # the number of positional arguments function always takes, or None if it's variable (or unknown)
+    try:
+        parameters = inspect.signature(function).parameters.values()
+    except (TypeError, ValueError):
+        return None
+    arity = 0
+    for parameter in parameters:
+        if parameter.kind in (parameter.VAR_POSITIONAL, parameter.VAR_KEYWORD) or parameter.default is not parameter.empty:
+            return None
+        elif parameter.kind != parameter.KEYWORD_ONLY:
+            arity += 1
+    return arity
+
+
+def vectorise(function=None, *, ranks=None):
+    # ranks gives, for each argument, the depth of List which function expects (so 0 means an atom, 1 means a flat List,
+    # etc.); anything nested deeper than that is mapped over, and anything shallower is broadcast. By default, all ranks
+    # are 0, so all Lists are mapped over
+    if function is None:
+        return functools.partial(vectorise, ranks=ranks)
+
+    if ranks is None:
+        arity = _arity(function)
+        if arity is not None:
+            ranks = (0,) * arity
+    else:
+        ranks = tuple(ranks)
+
+    # the dispatcher is specialised here, once, rather than working it all out on every call
+    # (comparing by identity, since function might not be hashable)
+    fast = numpy is not None and not any(ranks or ()) and any(function is op for op in _UFUNCS)
+    if ranks is None:
+        deeper = itertools.repeat(functools.partial(type.__instancecheck__, List))
+    else:
+        deeper = [
+            functools.partial(type.__instancecheck__, List) if rank == 0 else functools.partial(_deeper, rank=rank)
+            for rank in ranks
+        ]
+
+    def mapped(args, iterables):
+        # inner mapped over iterables, which are args with any that aren't being mapped over repeated
+        if fast:
+            result = _vectorise_numpy(function, args)
+            if result is not None:
+                return result
+        return List(map(inner, *iterables))
+
+    if ranks is not None and len(ranks) == 1:
+        (x_deeper,) = deeper
+
+        def inner(x):
+            if x_deeper(x):
+                return mapped((x,), (x,))
+            return function(x)
+
+    elif ranks is not None and len(ranks) == 2:
+        x_deeper, y_deeper = deeper
+
+        def inner(x, y):
+            if x_deeper(x):
+                return mapped((x, y), (x, y if y_deeper(y) else itertools.repeat(y)))
+            elif y_deeper(y):
+                return mapped((x, y), (itertools.repeat(x), y))
+            return function(x, y)
+
+    else:
+        def inner(*args):
+            flags = [d(arg) for d, arg in zip(deeper, args)]
+            if not any(flags):
+                return function(*args)
+            return mapped(args, [arg if flag else itertools.repeat(arg) for arg, flag in zip(args, flags)])
+
     return inner
@@ -1,3 +1,5 @@
+import operator
+import itertools
 from itertools import islice
 
 import pytest
@@ -90,6 +92,41 @@ def test_compare():
         List("apple") < 2
 
 
+def test_compare_lazy_and_finished():
+    def generator(s):
+        yield from s
+
+    for a in ("", "apple", "apply", "apples", "banana"):
+        for b in ("", "apple", "apply", "apples", "banana"):
+            for x in (List(a).exhaust(), List(generator(a))):
+                for y in (List(b).exhaust(), List(generator(b)), b):
+                    assert (x == y) is (a == b)
+                    assert (x != y) is (a != b)
+                    assert (x < y) is (a < b)
+                    assert (x <= y) is (a <= b)
+                    assert (x > y) is (a > b)
+                    assert (x >= y) is (a >= b)
+
+    # nested Lists compare element-wise
+    assert List([List("ab"), List("c")]) < List([List("ab"), List("d")])
+
+    # lists known to have different lengths are unequal without evaluating anything
+    def generator():
+        pytest.fail("generator should not be iterated")
+        yield
+
+    assert List(generator()).append(1) != ()
+    assert List(generator()).append(1) != List.nones(0)
+    assert not (List.repeat(generator(), 3) == List.repeat(generator(), 4))
+
+    # Lists can equal sequences which hash differently, so hashing doesn't change the result
+    a = List([List("ab").exhaust()]).exhaust()
+    b = List(["ab"]).exhaust()
+    assert a == b
+    hash(a), hash(b)
+    assert a == b
+
+
 def test_compare_identical():
     def generator():
         yield
@@ -127,6 +164,28 @@ def test_index():
     assert List(generator())[-1] == 9
     assert generator_executed
 
+    # indexing evaluates only as far as necessary, and only once
+    calls = 0
+
+    def generator():
+        nonlocal calls
+        for i in range(10):
+            calls += 1
+            yield i
+
+    l = List(generator())
+    assert l[5] == 5
+    assert calls == 6
+    assert [l[i] for i in range(6)] == list(range(6))
+    assert calls == 6
+    assert l[12] == 2
+    assert calls == 10
+
+    assert List.integers()[10 ** 5] == 10 ** 5
+
+    with pytest.raises(IndexError):
+        List()[0]
+
 
 def test_slice():
     l = List(range(10))
@@ -176,6 +235,36 @@ def test_slice():
     assert not generator_executed
 
 
+def test_slice_view():
+    l = List(range(10 ** 6)).exhaust()
+    s = l[10::3]
+    # slices of finished Lists know their length and support random access without copying
+    assert len(s) == len(range(10, 10 ** 6, 3))
+    assert s[5] == 25
+    assert s[-1] == 999_997
+    assert not s.cache
+    assert s[::-1][:3] == (999_997, 999_994, 999_991)
+    assert s[2:][:2] == (16, 19)
+    # nested slices refer directly to the original List
+    assert s[100:][::2]._view[0] is l
+    assert list(s.exhaust().cache) == list(range(10, 10 ** 6, 3))
+
+    # slices of unfinished Lists are still lazy
+    s = List.integers()[5:][::2][3:]
+    assert s._view[0]._view is None
+    assert s[:3] == (11, 13, 15)
+    assert s[1000] == 2011
+    assert List.integers()[:5] == range(5)
+    assert len(List.integers()[:5]) == 5
+
+    def generator():
+        yield from range(10)
+
+    s = List(generator())[2:]
+    assert s[3] == 5
+    assert s[10] == 4
+
+
 def test_reversed():
     assert list(reversed(List(range(10)))) == list(reversed(range(10)))
 
@@ -183,6 +272,25 @@ def test_reversed():
 def test_len():
     assert len(List(range(10))) == 10
 
+    # known lengths don't require any evaluation
+    def generator():
+        pytest.fail("generator should not be iterated")
+        yield
+
+    assert len(List.repeat(generator(), 10 ** 9)) == 10 ** 9
+    assert len(List(range(10)).append(1).prepend(2).insert(3, 4)) == 13
+    assert len(List((1, 2)).extend(range(5)).substitute(0, 5)) == 7
+    assert len(List("abcdefghijk").combinations(5)) == 462
+    assert len(List("abcdefghijk").power(5)) == 11 ** 5
+    assert len(List(range(20)).powerset()) == 2 ** 20
+    assert len(List.repeat(0, 10 ** 9)[::7]) == len(range(0, 10 ** 9, 7))
+    assert List.repeat(0, 10 ** 9).length_compare_int(10 ** 9 + 1) == -1
+    assert List(range(10 ** 9)).length_compare_length(range(5)) == +1
+    assert List(range(10 ** 9)).__length_hint__() == 10 ** 9
+    assert List(generator()).append(1).__length_hint__() == 1
+    assert bool(List(generator()).prepend(1)) is True
+    assert bool(List.nones(0)) is False
+
 
 def test_repr():
     assert repr(List(range(10))) == repr(list(range(10)))
@@ -311,15 +419,313 @@ def test_extend():
     assert generator_executed == {"hello"}
 
 
+def test_concatenation_chains():
+    l = List()
+    for i in range(100_000):
+        l = l.append(i)
+    # iterating a long chain of appends doesn't recurse through every previous List
+    assert l == range(100_000)
+    assert l[56_789] == 56_789
+    assert len(l) == 100_000
+
+    # and nor does a long chain of inserts
+    l = List("ab")
+    expected = list("ab")
+    for i in range(2_000):
+        l = l.insert(1, i)
+        expected.insert(1, i)
+    assert l == expected
+    l = l.insert(10 ** 9, "z").insert(3000, "y").insert(0, "x")
+    assert l[:3] == ["x", "a", 1999] and l[-3:] == ["b", "z", "y"]
+
+    l = List(range(3))
+    for i in range(10_000):
+        l = l.prepend(-i).extend((i, i))
+    assert l[:4] == (-9999, -9998, -9997, -9996)
+    assert l[-4:] == (9998, 9998, 9999, 9999)
+    assert l[10_000:10_005] == (0, 1, 2, 0, 0)
+    assert len(l) == 30_003
+
+    # ropes share structure, but branching from the same List must not interfere
+    base = List("ab").append("c")
+    x = base.append("x")
+    y = base.append("y")
+    assert base == "abc"
+    assert x == "abcx"
+    assert y == "abcy"
+    assert x.extend(y).prepend("!") == "!abcxabcy"
+    assert x.insert(1, y)[:3] == ["a", y, "b"]
+    assert x.insert(2, "q")[2] == "q"
+
+    # parts of unknown length
+    def generator():
+        yield from "hello"
+
+    l = List(generator()).append("!").prepend("¡")
+    assert l[2] == "e"
+    assert l == "¡hello!"
+
+
 def test_chain():
     assert List.chain() == ()
     assert List.chain("hello", "there", "", "!") == "hellothere!"
 
 
+def test_pipeline():
+    calls = []
+
+    def f(x):
+        calls.append(x)
+        return x * 2
+
+    source = List(range(10))
+    doubled = source.map(f)
+    evens = doubled.filter(lambda x: x % 4 == 0)
+    result = evens.map(str)
+    assert result == ["0", "4", "8", "12", "16"]
+    assert calls == list(range(10))
+    # the intermediate stages were fused, so didn't cache anything
+    assert not doubled.cache and not evens.cache
+    # but they can still be evaluated independently
+    assert evens == [0, 4, 8, 12, 16]
+    assert doubled[3] == 6
+
+    # reducing a pipeline doesn't cache it either
+    squares = List.integers().map(lambda x: x * x).filter(lambda x: x % 2)
+    assert squares[:50].reduce(operator.add) == sum(x * x for x in range(1, 100, 2))
+    l = List(range(1, 6)).map(lambda x: x * x)
+    assert l.reduce(operator.add, 100) == 155
+    assert not l.cache
+    assert List().reduce(operator.add, 0) == 0
+    with pytest.raises(TypeError):
+        List().reduce(operator.add)
+
+    # multiple iterables
+    assert List("abc").map(lambda *a: "".join(a), "xyz", List("pq")) == ["axp", "byq"]
+    assert len(List("abc").map(operator.add, "xyz")) == 3
+    assert List("abc").zip(range(5)) == [("a", 0), ("b", 1), ("c", 2)]
+    assert List.integers().zip(List("ab").loop())[:3] == [(0, "a"), (1, "b"), (2, "a")]
+    assert List(range(10)).filter() == range(1, 10)
+
+
+def test_stream():
+    from libgolf.list import EvictedError
+
+    with pytest.raises(ValueError):
+        List.stream(range(10), window=0)
+
+    l = List.stream(range(1000), window=10)
+    assert sum(l) == sum(range(1000))
+    assert len(l.cache) <= 20
+    assert len(l) == 1000
+    assert l[-1] == 999 and l[995] == 995
+    with pytest.raises(EvictedError):
+        l[0]
+    with pytest.raises(EvictedError):
+        list(l)
+
+    # indexing ahead forgets everything in between
+    l = List.stream(List.integers(), window=5)
+    assert l[10 ** 5] == 10 ** 5
+    assert len(l.cache) <= 10
+    with pytest.raises(EvictedError):
+        l[10]
+
+    # combinators stream too
+    text = List.stream(islice(List("ab,cde,").loop(), 28000), window=4)
+    pieces = text.split(",")
+    assert pieces._window == 4
+    total = 0
+    for piece in pieces:
+        total += len(piece)
+    assert total == 20000
+    assert len(text.cache) <= 8
+
+    replaced = List.stream(islice(List("abcab").loop(), 10000), window=8).replace_substrings("ab", "X")
+    assert replaced._window == 8
+    assert sum(1 for x in replaced if x == "X") == 4000
+    assert len(replaced.cache) <= 16
+    assert List.stream(range(100), window=3).find(50) == [50]
+    assert List.stream("hello", window=2).replace("l", "y", maxcount=1) == "heylo"
+
+
+def test_threadsafe():
+    import sys
+    import threading
+
+    def generator():
+        yield from range(20000)
+
+    l = List.threadsafe(generator())
+    odd = l.map(lambda x: x + 1).filter(lambda x: x % 2)
+    assert odd._lock is not None and odd._lock is not l._lock
+    results = [None] * 8
+
+    def run(k):
+        results[k] = list(l) if k % 2 else list(odd[:5000])
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=run, args=(k,)) for k in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert results[1::2] == [list(range(20000))] * 4
+    assert results[::2] == [list(range(1, 10000, 2))] * 4
+
+    # derived Lists which don't go through map etc. are thread-safe too
+    def read_concurrently(make, expected, count=6):
+        results = [None] * count
+        derived = make()
+
+        def run(k):
+            results[k] = list(derived)
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [threading.Thread(target=run, args=(k,)) for k in range(count)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        assert results == [expected] * count
+
+    for _ in range(10):
+        read_concurrently(lambda: reversed(List.threadsafe(generator())), list(range(19999, -1, -1)))
+    small = [(x, y) for x in range(40) for y in range(40)]
+
+    def small_generator():
+        yield from range(40)
+
+    read_concurrently(lambda: List.threadsafe(small_generator()).power(2), small)
+    read_concurrently(lambda: List.product(List(range(40)), List.threadsafe(small_generator())), small)
+    assert List.threadsafe(range(3)).power(0)._lock is not None
+
+    assert List.threadsafe(range(5))[7] == 2
+    assert List.threadsafe(generator()).exhaust()[-1] == 19999
+
+
+def test_pmap():
+    import concurrent.futures
+    import time
+
+    def slow_square(x):
+        time.sleep(0.001 * (x % 3))
+        return x * x
+
+    assert List(range(20)).pmap(slow_square) == [x * x for x in range(20)]
+    assert len(List(range(20)).pmap(slow_square)) == 20
+    assert List().pmap(slow_square) == []
+
+    # only a bounded number of items are computed ahead, so infinite Lists work
+    calls = 0
+
+    def counted(x):
+        nonlocal calls
+        calls += 1
+        return -x
+
+    with concurrent.futures.ThreadPoolExecutor(4) as executor:
+        l = List.integers().pmap(counted, executor, prefetch=3)
+        assert not calls
+        assert l[:5] == [0, -1, -2, -3, -4]
+        assert calls <= 5 + 3
+        # a given executor isn't shut down
+        assert executor.submit(abs, -1).result() == 1
+
+    def fail(x):
+        if x == 3:
+            raise ZeroDivisionError
+        return x
+
+    l = List(range(10)).pmap(fail, prefetch=2)
+    assert l[:3] == [0, 1, 2]
+    with pytest.raises(ZeroDivisionError):
+        l[3]
+    with pytest.raises(ValueError):
+        List().pmap(abs, prefetch=0)
+
+    with concurrent.futures.ProcessPoolExecutor(2) as executor:
+        assert List(range(-5, 5)).pmap(abs, executor) == [5, 4, 3, 2, 1, 0, 1, 2, 3, 4]
+
+
+def test_batched():
+    # side-effect-free sources are evaluated ahead in growing batches
+    l = List(range(10 ** 6))
+    assert l[0] == 0
+    assert 1 < len(l.cache) < 100
+    for i, x in enumerate(l):
+        if i == 10 ** 4:
+            break
+    assert len(l.cache) < 2 * 10 ** 4
+    assert sum(l) == sum(range(10 ** 6))
+    assert List([1, 2, 3])[5] == 3
+    assert List.integers()[12345] == 12345
+
+    # other sources aren't, unless explicitly asked for
+    calls = 0
+
+    def generator():
+        nonlocal calls
+        for i in range(100):
+            calls += 1
+            yield i
+
+    l = List(generator())
+    assert l[3] == 3 and calls == 4
+    l = List.batched(generator())
+    assert l[3] == 3 and calls > 8
+    # already evaluated items don't fetch another batch
+    before = calls
+    for _ in range(10):
+        l.length_compare_int(3)
+    assert calls == before
+    # nor are iterators, which might be shared with the caller
+    it = iter((1, 2, 3, 4, 5))
+    assert List(it)[0] == 1
+    assert next(it) == 2
+    c = itertools.count()
+    assert List(c)[0] == 0
+    assert next(c) == 1
+    # mutable sources aren't either, since they might change before they're evaluated
+    source = [1, 2]
+    l = List(source)
+    assert l[0] == 1
+    source.append(3)
+    assert l == [1, 2, 3]
+    l = List.batched(range(100), False)
+    assert l[3] == 3 and len(l.cache) == 4
+    assert List.batched(generator()) == range(100)
+
+
 def test_flat():
     assert List([1, List(), 3, List([6, 7]), 2, 4, List([List([8]), List([5, 9])])]).flat() == [1, 3, 6, 7, 2, 4, 8, 5, 9]
     assert List([1, List(), 3, List([6, 7]), 2, 4, List([List([8]), List([5, 9])])]).flat(maxdepth=2) == [1, 3, 6, 7, 2, 4, 8, 5, 9]
     assert List([1, List(), 3, List([6, 7]), 2, 4, List([List([8]), List([5, 9])])]).flat(maxdepth=1) == [1, 3, 6, 7, 2, 4, (8,), (5, 9)]
+    assert List([1, List([2])]).flat(maxdepth=0) == [1, (2,)]
+
+    class Atom(List):
+        pass
+
+    assert List([Atom([1, 2]), List([3, Atom([List([4])])])]).flat(atoms=Atom) == [(1, 2), 3, ((4,),)]
+
+    # deeper than the recursion limit
+    l = List([5])
+    for _ in range(10 ** 5):
+        l = List([l])
+    assert list(l.flat()) == [5]
+    assert list(l.flat(maxdepth=10 ** 5)) == [5]
+    assert list(l.flat(maxdepth=10 ** 5 - 1)) == [List([5])]
+
+    # lazy, including when infinitely nested
+    assert List([List(range(3)).loop()]).flat()[:5] == [0, 1, 2, 0, 1]
 
 
 def test_prefixes():
@@ -360,6 +766,13 @@ def test_find_substrings():
     assert next(iter(List(generator()).find_substrings("e"))) == 1
     assert not generator_executed
 
+    # works on infinite lists, and only reads as far as necessary
+    assert List.integers().find_substrings((5, 6))[0] == 5
+    assert List("ab").loop().find_substrings("bab")[:3] == (1, 5, 9)
+    # partial matches which fail must not skip over the start of a later match
+    assert List("aabaabaaab").find_substrings("aaab") == [6]
+    assert List("abababc").find_substrings("ababc") == [2]
+
 
 def test_find():
     assert List("hello").find("l") == (2, 3)
@@ -407,6 +820,11 @@ def test_replace_substrings():
     assert "".join(islice(List(generator()).replace_substrings("l", "y"), 3)) == "hey"
     assert not generator_executed
 
+    assert List("hello").replace_substrings("", "-") == "-h-e-l-l-o-"
+    assert List("hello").replace_substrings("", "-", maxcount=2) == "-h-ello"
+    assert List("aabaabaaab").replace_substrings("aaab", "x") == "aabaabx"
+    assert List.integers().replace_substrings((1, 2), "x", maxcount=1)[:4] == (0, "x", 3, 4)
+
 
 def test_replace():
     assert List("hello").replace("e", "a") == "hallo"
@@ -442,6 +860,17 @@ def test_unique():
     assert List((a, b, a)).unique()[0] is a is not b
     assert List((b, a, a)).unique()[0] is b is not a
 
+    # nested Lists
+    assert List([List("ab"), List("cd"), List("ab"), List("a")]).unique() == ["ab", "cd", "a"]
+    assert List(List(x) for x in ["ab", "cd", "ab", "a"]).unique() == ["ab", "cd", "a"]
+    assert List(List.integers()[i:] for i in range(3)).unique()[:3][2][:2] == [2, 3]
+    assert List([List([a]), List([b])]).unique() == [[a]]
+
+    # Lists and equal tuples
+    assert List([(1, 2), List([1, 2]).exhaust()]).unique() == [(1, 2)]
+    assert List([List(iter([1, 2])), (1, 2), List([(1, 2)]), ((1, 2),)]).unique() == [(1, 2), ((1, 2),)]
+    assert List(List.integers()[i:] for i in range(3)).unique()[:2][1][:2] == [1, 2]
+
 
 def test_product():
     assert List.product() == ((),)
@@ -462,12 +891,35 @@ def test_product():
     assert List.product(generator(), "def")[:9] == ("ad", "ae", "af", "bd", "be", "bf", "cd", "ce", "cf")
     assert not generator_executed
 
+    # items can be found directly, without going through all the earlier ones
+    assert List.product(range(10 ** 6), "abc", range(10 ** 6))[10 ** 12] == (333333, "b", 0)
+    assert List.product(List.integers(), "ab")[1001] == (500, "b")
+    assert List.product(generator(), "def")[-1] == "cf"
+
+
+def test_fair_product():
+    assert List.product(fair=True) == ((),)
+    assert List.product("abc", (), fair=True) == ()
+    assert List.product("ab", "cde", fair=True) == ("ac", "ad", "bc", "ae", "bd", "be")
+    assert len(List.product("ab", "cde", fair=True)) == 6
+    assert List("ab").power(3, fair=True) == ("aaa", "aab", "aba", "baa", "abb", "bab", "bba", "bbb")
+
+    # every pair of infinite Lists is reached, only evaluating as much of each as needed
+    x, y = List.integers(), List(List.integers())
+    pairs = List.product(x, y, fair=True)
+    assert pairs[:6] == ((0, 0), (0, 1), (1, 0), (0, 2), (1, 1), (2, 0))
+    assert pairs.find([3, 4])[0] == 31
+    assert len(y.cache) == 8
+    assert List.product("ab", List.integers(), fair=True)[:5] == (("a", 0), ("a", 1), ("b", 0), ("a", 2), ("b", 1))
+
 
 def test_power():
     assert List("abc").power(2) == ("aa", "ab", "ac", "ba", "bb", "bc", "ca", "cb", "cc")
     assert List("abc").power(1) == "abc"
     assert List("abc").power(0) == ((),)
     assert len(List("abc").power(5)) == len("abc") ** 5
+    assert List(range(100)).power(10)[10 ** 19 + 12345] == (10, 0, 0, 0, 0, 0, 0, 1, 23, 45)
+    assert List(range(3)).power(3)[::7] == ((0, 0, 0), (0, 2, 1), (1, 1, 2), (2, 1, 0))
 
 
 def test_combinations():
@@ -488,6 +940,12 @@ def test_combinations():
     assert List(generator()).combinations(2)[:2] == ("ab", "ac")
     assert not generator_executed
 
+    l = List(range(7))
+    combinations = l.combinations(3)
+    assert [combinations[i] for i in range(len(combinations))] == list(combinations)
+    assert list(combinations)[::10] == [(0, 1, 2), (0, 3, 5), (1, 3, 5), (2, 5, 6)]
+    assert List(range(60)).combinations(30)[-1] == range(30, 60)
+
 
 def test_bool():
     assert bool(List()) is False
@@ -527,12 +985,45 @@ def test_hash():
     l3.exhaust()
     assert hash(l) == hash(l3)
 
+    # finished Lists hash like the equal tuples, however long they are
+    assert hash(List(range(1000)).exhaust()) == hash(tuple(range(1000)))
+    assert List(range(100)).exhaust() in {tuple(range(100))}
+
+    # nested Lists hash like the equal tuples
+    l = List([List([1, 2]).exhaust()]).exhaust()
+    assert l == List([(1, 2)]).exhaust()
+    assert hash(l) == hash(List([(1, 2)]).exhaust()) == hash(((1, 2),))
+    assert hash(List([List([List([3]).exhaust()]).exhaust(), 4]).exhaust()) == hash((((3,),), 4))
+
 
 def test_integers():
     assert List.integers()[:100] == range(100)
     assert List.integers(1)[:100] == range(1, 101)
 
 
+def test_packed():
+    l = List(range(10 ** 5)).exhaust()
+    assert l.buffer().nbytes == 8 * 10 ** 5
+    assert l.buffer()[12345] == 12345
+    assert l == range(10 ** 5)
+    assert l[::-1][:3] == (99999, 99998, 99997)
+
+    l = List.packed([1.5, 2.5])
+    assert l.buffer().format == "d"
+    assert l == [1.5, 2.5]
+
+    # items which don't fit make the List fall back to normal storage
+    for items in ([1, 2 ** 64, 3], [1, True], [1, 2.5], [1.5, 2], [1, "a"]):
+        l = List.packed(items)
+        assert l == items
+        assert all(type(x) is type(y) for x, y in zip(l, items))
+        with pytest.raises(TypeError):
+            l.buffer()
+
+    l = List.integers(2 ** 63 - 3)
+    assert l[:5] == range(2 ** 63 - 3, 2 ** 63 + 2)
+
+
 def test_powerset():
     assert List().powerset() == [[]]
     assert List((1,)).powerset() == [[], [1]]
@@ -556,6 +1047,12 @@ def test_powerset():
     o.exhaust()
     assert generator_executed == 4
 
+    # subsets can be found directly, and only need enough of self for their highest item
+    o = List(generator()).powerset()
+    assert o[13] == [1, 3, 4]
+    assert generator_executed == 4
+    assert List.integers().powerset()[2 ** 100 + 5] == [0, 2, 100]
+
 
 def test_strip():
     assert List("aaa").lstrip("a") == ""
@@ -588,6 +1085,13 @@ def test_strip():
     assert List("abc").strip(("ab", "a")) == "bc"
     assert List("abc").strip(("bc", "c")) == "ab"
 
+    # stripping the end is lazy, and doesn't need to go back over anything
+    assert List("ab  c ").loop().rstrip(" ")[:7] == "ab  c a"
+    assert List("  ab  c ").loop().strip(" ")[:9] == "ab  c   a"
+    l = List.stream(islice(List("   ab").loop(), 9999), window=2).strip(" ")
+    assert l._window == 2
+    assert sum(1 for _ in l) == 9996
+
 
 def test_loop():
     assert List("abc").loop()[:10] == "abcabcabca"
@@ -596,3 +1100,28 @@ def test_loop():
 def test_split():
     assert List("abcd").split("b") == ("a", "cd")
     assert List("abcd").split("b") == ("a", "cd")
+    assert List("a,b;c,").split(",;") == ("a", "b", "c", "")
+    assert List("abcd").split(List("xb")) == ("a", "cd")
+    assert List([[1], 2, [1], 3]).split([List([1])]) == ((), (2,), (3,))
+    assert List([[1], 2]).split([[1], 2]) == ((), (), ())
+
+    # pieces can be used out of order
+    l = List(iter("a,b,c")).split(",")
+    assert l[2] == "c"
+    assert l[0] == "a"
+    assert l == ("a", "b", "c")
+    assert List("ab,").loop().split(",")[:3] == ("ab", "ab", "ab")
+
+
+def test_split_substrings():
+    assert List("a--b-c").split_substrings(["--"]) == ("a", "b-c")
+    assert List("a--b-c--").split_substrings(List(["--"])) == ("a", "b-c", "")
+    assert List("xabcyab--z").split_substrings(["ab", "--"]) == ("x", "cy", "", "z")
+    # the match which ends first wins, and then the longest one
+    assert List("xabcy").split_substrings(["abc", "b"]) == ("xa", "cy")
+    assert List("aaabaab").split_substrings(["aab", "ab", "ba"]) == ("a", "", "")
+    assert List("hello world").split_substrings(["o w", "l"]) == ("he", "", "", "or", "d")
+    assert List([1, [2], 3, 1, [2]]).split_substrings([[1, List([2])], [3, 4]]) == ((), (3,), ())
+    assert List("abc").loop().split_substrings(["ca", "bb"])[:3] == ("ab", "b", "b")
+    with pytest.raises(ValueError):
+        List("abc").split_substrings(["a", ""])
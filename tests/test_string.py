@@ -1,3 +1,4 @@
+import itertools
 import pytest
 
 from libgolf.list import List
@@ -41,6 +42,16 @@ def test_character():
     assert f"{s:8}" == "hello   "
 
 
+def test_character_interning():
+    assert Character("a") is Character(97) is Character(Character("a"))
+    assert Character("€") is Character("€") is Character(0x20AC)
+    assert Character("\U0001F600") is Character("\U0001F600")
+    assert list(Character.chars("aé€")) == ["a", "é", "€"]
+    assert [c is Character(c) for c in Character.chars("aé€")] == [True, True, True]
+    assert all(type(c) is Character for c in Character.chars("aé€"))
+    assert String("Hello").upper()[0] is Character("H")
+
+
 def test_string():
     assert issubclass(String, List)
 
@@ -54,9 +65,95 @@ def test_string():
     assert repr(String("hello")) == "'hello'"
     assert type(repr(String("hello"))) is str is not String
 
+    assert String("Hello").append("!") == "Hello!"
+    assert all(isinstance(c, Character) for c in String("ello").prepend("H").extend(["!"]))
+
     assert String("Hello").upper() == "HELLO"
     assert String("Hello").lower() == "hello"
 
+    # multi-character mappings
+    assert String("straße").upper() == "STRASSE"
+    assert String(iter("straße")).upper() == "STRASSE"
+    assert String("İ").lower() == "i̇"
+    assert all(type(c) is Character for c in String(iter("ßİ" * 100)).upper())
+    assert str(String(iter("ßİ" * 100)).upper()) == ("ßİ" * 100).upper()
+
+    # context-sensitive mappings give the same result however far the String has been evaluated
+    for s in ("ΑΣ Α", "ΑΣΑ", "ΑΣ", "Σ", "ΑΣ'Α", "Α'Σ", "1Σ", "ΑΣ́Α", "ΑΣ" * 100, "ΑΣΣ Α" * 100):
+        assert str(String(iter(s)).lower()) == str(String(s).lower()) == s.lower()
+    assert String(itertools.cycle("ΑΣ ")).lower()[:7] == "ας ας α"
+    # and don't need any particular boundaries to stay lazy
+    assert String(itertools.cycle("Σ")).lower()[:3] == "σσσ"
+    assert String(itertools.cycle(".")).lower()[0] == "."
+    assert String(itertools.cycle("ΑΣ.")).lower()[:7] == "ασ.ασ.α"
+    assert String(itertools.cycle("ΑΣ'")).lower()[:7] == "ασ'ασ'α"
+
+    # ensure lazy
+    def generator():
+        yield from "hello"
+        nonlocal generator_executed
+        generator_executed = True
+
+    generator_executed = False
+    assert String(generator()).upper()[:3] == "HEL"
+    assert not generator_executed
+
+
+def test_native_storage():
+    s = String("hello, world")
+    assert s.finished
+    assert str(s) is str(s)
+    assert s[7] == "w"
+    assert type(s[7]) is Character
+    assert s[7:][:3] == "wor"
+    assert type(s[7:][:3]) is String
+    assert str(s[7:12]) == "world"
+    assert str(s[::-1]) == "dlrow ,olleh"
+    assert String(s).cache is s.cache
+    assert s == String("hello, world") != String("hello, worlds")
+    assert s < String("help")
+    assert s == List("hello, world")
+    assert hash(s) == hash(String("hello, world"))
+
+    # Strings from lazy sources stay lazy
+    def generator():
+        yield from "hello"
+        nonlocal generator_executed
+        generator_executed = True
+
+    generator_executed = False
+    s = String(generator())
+    assert s[:5] == "hello"
+    assert not generator_executed
+    assert str(s) == "hello"
+    assert generator_executed
+    assert str(s) is str(s)
+
+
+def test_native_search():
+    def lazy(s):
+        return String(iter(s))
+
+    for haystack in ("", "hello", "aaaaaa", "abbccbbdddbbb", "a,b;;c,"):
+        for pattern in ("", "l", "aa", "bb", "hello", "x", ",", ";"):
+            expected = List(haystack).find_substrings(pattern)
+            assert String(haystack).find_substrings(pattern) == expected
+            assert String(haystack).find_substrings(String(pattern)) == expected
+            assert lazy(haystack).find_substrings(pattern) == expected
+            assert type(String(haystack).find_substrings(pattern)) is List
+
+            for maxcount in (-1, 0, 1, 2):
+                expected = List(haystack).replace_substrings(pattern, "xy", maxcount)
+                assert String(haystack).replace_substrings(pattern, "xy", maxcount) == expected
+                assert lazy(haystack).replace_substrings(pattern, "xy", maxcount) == expected
+
+        for delimiters in ("", ",", ",;", "l", "ab"):
+            expected = List(haystack).split(delimiters)
+            assert String(haystack).split(delimiters) == expected
+            assert String(haystack).split(String(delimiters)) == expected
+            assert lazy(haystack).split(delimiters) == expected
+            assert all(type(piece) is String for piece in String(haystack).split(delimiters))
+
 
 def test_hash():
     assert hash(String("hello")) != hash(List("hello"))
@@ -1,4 +1,10 @@
-from libgolf.list import List
+import math
+import operator
+import warnings
+
+import pytest
+
+from libgolf.list import EvictedError, List
 from libgolf.vectorise import vectorise
 
 
@@ -28,3 +34,90 @@ def test_vectorise():
     assert vectorise(decad)(
         *map(List, ["ab", "cd", "ef", "gh", "ij", "kl", "mn", "op", "qr", "st"])
     ) == ["a+c+e+g+i+k+m+o+q+s", "b+d+f+h+j+l+n+p+r+t"]
+
+    # callables needn't be hashable
+    class Scale:
+        def __init__(self, factor):
+            self.factor = factor
+
+        def __eq__(self, other):
+            return isinstance(other, Scale) and self.factor == other.factor
+
+        def __call__(self, x):
+            return x * self.factor
+
+    assert vectorise(Scale(3))(l(1, 2)) == [3, 6]
+
+
+def test_vectorise_ranks():
+    # rank 1: the function takes flat Lists
+    total = vectorise(lambda x: sum(x), ranks=(1,))
+    assert total(l(1, 2, 3)) == 6
+    assert total(l(l(1, 2), l(3), l(l(4, 5)))) == [3, 3, [9]]
+
+    @vectorise(ranks=(1, 0))
+    def index(xs, i):
+        return xs[i]
+
+    assert index(l(5, 6, 7), 1) == 6
+    assert index(l(5, 6, 7), l(0, 2)) == [5, 7]
+    assert index(l(l(5, 6), l(7, 8)), 1) == [6, 8]
+    assert index(l(l(5, 6), l(7, 8)), l(0, 1)) == [5, 8]
+
+    # only the first item decides the depth, so infinite Lists work too
+    assert vectorise(lambda x: x[0], ranks=(1,))(List.integers()) == 0
+    assert vectorise(lambda x: x[:2], ranks=(1,))(List.repeat(List.integers()))[:2] == [[0, 1], [0, 1]]
+
+    # three or more arguments
+    f = vectorise(lambda a, b, c: (a, b, c), ranks=(0, 1, 0))
+    assert f(l(1, 2), l(3), 4) == [(1, l(3), 4), (2, l(3), 4)]
+
+    # with no ranks given, functions of variable arity work the same as fixed arity
+    assert vectorise(lambda *a: sum(a))(1, l(2, 3), l(l(4), l(5))) == [[7], [9]]
+
+    # infinite Lists can be broadcast against
+    assert vectorise(lambda x, y: x * y)(List.integers(), 2)[:3] == (0, 2, 4)
+    assert vectorise(lambda x, y: x + y)(List.integers(), List.integers(10))[:3] == (10, 12, 14)
+
+
+def test_vectorise_numpy():
+    numpy = pytest.importorskip("numpy")
+
+    ints = List(range(-5, 6)).exhaust()
+    floats = List([x / 4 for x in range(-5, 6)]).exhaust()
+    others = [List([1, True]).exhaust(), List([2 ** 40, 2]).exhaust(), List([1, 2.5]).exhaust(), List(iter([1, 2]))]
+    for op in (operator.add, operator.sub, operator.mul, operator.truediv, operator.floordiv, operator.mod, operator.lt, operator.eq):
+        fast = vectorise(op)
+        # same function, but not recognised as a numpy operation
+        slow = vectorise(lambda x, y: op(x, y))
+        for x in (ints, floats, 3, 2.5, *others):
+            for y in (ints[:7], floats, -3, 0.5, *others):
+                try:
+                    expected = list(slow(x, y))
+                except (ZeroDivisionError, TypeError):
+                    with pytest.raises((ZeroDivisionError, TypeError)):
+                        list(fast(x, y))
+                else:
+                    actual = list(fast(x, y))
+                    assert actual == expected
+                    assert [type(a) for a in actual] == [type(e) for e in expected]
+
+    assert vectorise(operator.neg)(ints) == range(5, -6, -1)
+    # the result is a single batched operation, so is already finished and packed
+    assert vectorise(operator.add)(ints, 1).buffer().tolist() == list(range(-4, 7))
+
+    # ints which numpy can't handle exactly are left to Python
+    smallest = List(range(-2 ** 63, -2 ** 63 + 1)).exhaust()
+    assert vectorise(operator.abs)(smallest) == [2 ** 63]
+    assert vectorise(operator.mul)(smallest, 2) == [-2 ** 64]
+    assert vectorise(operator.neg)(List([-2 ** 31, 5]).exhaust()) == [2 ** 31, -5]
+
+    # floats overflow silently, as in Python
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert vectorise(operator.mul)(List([1e308, 2.0]).exhaust(), 10) == [math.inf, 20.0]
+        assert all(map(math.isnan, vectorise(operator.sub)(List([math.inf, math.nan]).exhaust(), math.inf)))
+
+    # a finished streaming List has forgotten all but its window
+    with pytest.raises(EvictedError):
+        list(vectorise(operator.neg)(List.stream(iter(range(10)), 2).exhaust()))